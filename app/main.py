@@ -6,17 +6,29 @@ Použití: python vpn_clicker.py
 import subprocess
 import time
 import os
-import glob
 import logging
+import logging.handlers
 import tempfile
 import shutil
 import stat
+import atexit
+import selectors
+import pty
+import socket
+import queue
+import re
+import sys
+import getpass
 import argparse
+import functools
+import asyncio
+import contextlib
 
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
 from pathlib import Path
+from urllib.parse import urlparse
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeout
+from playwright.async_api import async_playwright, expect, TimeoutError as PWTimeout
 
 # Načtení .env souboru
 env_path = Path(__file__).resolve().parent.parent / '.env'
@@ -29,36 +41,179 @@ OPENVPN_BIN = os.getenv("OPENVPN_BIN", "/usr/local/opt/openvpn/sbin/openvpn")  #
 OPENVPN_USER = os.getenv("OPENVPN_USER")
 OPENVPN_PASS = os.getenv("OPENVPN_PASS")
 OPENVPN_AUTH_FILE = os.getenv("OPENVPN_AUTH_FILE")  # cesta k souboru s řádky: username\npassword
+# Šifry datového kanálu v pořadí preference: AES-GCM využívá hardwarovou akceleraci (AES-NI / ARMv8)
+# a ušetří HMAC-SHA512 na každém paketu; AES-256-CBC z configů zůstává jako poslední možnost
+OPENVPN_DATA_CIPHERS = os.getenv("OPENVPN_DATA_CIPHERS", "AES-128-GCM:AES-256-GCM:AES-256-CBC")
 PAGE_URL = "https://nachodsky.denik.cz/zpravy_region/anketa-nejpopularnejsi-dobrovolni-hasici-na-nachodsku-2025.html"
 TARGET_TEXT = "SDH Bukovice"  # text pro identifikaci správné sekce
 BUTTON_SELECTOR = "button.survey__answer-btn"  # tlačítko pro hlasování
 VOTES_SELECTOR = ".survey__progress-text-result"  # selektor pro počet hlasů
+SECTION_SELECTOR = f".survey__progress-text >> text={TARGET_TEXT}"  # sekce s cílovým textem
+SECTION_CONTAINER_XPATH = "xpath=../../../.."  # z textu sekce na kontejner s tlačítkem a počtem hlasů
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font", "stylesheet")  # pro hlasování nepotřebné zdroje
+PUSH_IFCONFIG_RE = re.compile(rb"PUSH_REPLY.*?,ifconfig (\d+\.\d+\.\d+\.\d+)")  # adresa tunelu od serveru
 COOKIES_DELAY = int(os.getenv("COOKIES_DELAY", "5"))  # čekání po odkliknutí cookies v sekundách
 CONNECT_TIMEOUT = int(os.getenv("CONNECT_TIMEOUT", "30"))  # sekundy na navázání VPN
 ACTION_TIMEOUT = int(os.getenv("ACTION_TIMEOUT", "60"))  # sekundy na načtení a kliknutí
-WAIT_AFTER_CLICK = int(os.getenv("WAIT_AFTER_CLICK", "3"))  # čekání po kliknutí
+WAIT_AFTER_CLICK = int(os.getenv("WAIT_AFTER_CLICK", "3"))  # max. čekání na aktualizaci hlasů po kliknutí
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))  # maximální počet pokusů o načtení stránky
 RETRY_DELAY = int(os.getenv("RETRY_DELAY", "5"))  # čekání mezi pokusy v sekundách
+VOTES_PER_VPN = int(os.getenv("VOTES_PER_VPN", "1"))  # počet hlasů na jedno připojení VPN
 LOGFILE = "vpn_clicker.log"
+# Paralelní běh: každý worker má vlastní síťový namespace <NETNS_PREFIX><i> (ns0, ns1, ...),
+# aby si souběžné OpenVPN instance nepřepisovaly výchozí trasu. Namespacy musí předem existovat.
+NETNS_PREFIX = os.getenv("NETNS_PREFIX", "ns")
+# Proměnné předávané workerům: sudo při spuštění v namespace prostředí resetuje (env_reset)
+WORKER_ENV_VARS = ("CONNECT_TIMEOUT", "ACTION_TIMEOUT", "COOKIES_DELAY", "WAIT_AFTER_CLICK", "MAX_RETRIES",
+                   "RETRY_DELAY", "VOTES_PER_VPN", "OPENVPN_DATA_CIPHERS", "DEBUG")
 
 # Debug mód z .env
 DEBUG = os.getenv("DEBUG", "0").lower() in ("1", "true", "yes", "on")
 log_level = logging.DEBUG if DEBUG else logging.INFO
-logging.basicConfig(level=log_level,
-                    format="%(asctime)s [%(levelname)s] %(message)s",
-                    handlers=[logging.FileHandler(LOGFILE), logging.StreamHandler()])
+# Záznamy se jen vloží do fronty; zápis do souboru a na konzoli dělá vlákno QueueListeneru,
+# takže pomalý disk nezdržuje čtení výstupu OpenVPN ani hlavní smyčku
+_log_formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
+_log_handlers = [logging.FileHandler(LOGFILE), logging.StreamHandler()]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = queue.Queue(-1)
+# QueueHandler do záznamu vloží jen samotnou zprávu, formát doplní až handlery listeneru
+logging.basicConfig(level=log_level, format="%(message)s", handlers=[logging.handlers.QueueHandler(_log_queue)])
+_log_listener = logging.handlers.QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 # ----------------------------------
 
 def find_ovpn_files(directory):
-    files = glob.glob(os.path.join(directory, "*.ovpn"))
+    # DirEntry.is_file() využije typ položky z výpisu adresáře, stat() volá jen u symlinků;
+    # skryté soubory (např. AppleDouble ._*.ovpn z macOS) přeskakujeme stejně jako glob
+    with os.scandir(directory) as it:
+        files = [e.path for e in it
+                 if e.name.endswith(".ovpn") and not e.name.startswith(".") and e.is_file()]
     files.sort()
     return files
 
+def _source_ip():
+    """
+    Vrátí zdrojovou IP adresu, kterou jádro zvolí pro provoz do internetu (None, pokud trasa není).
+    UDP connect nic neodesílá, jen vybere trasu.
+    """
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("1.1.1.1", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+_runtime_dir_path = None
+
+def _runtime_dir():
+    """
+    Vrátí soukromý dočasný adresář pro tento běh (vytvoří ho při prvním volání, smaže při ukončení).
+    """
+    global _runtime_dir_path
+    if _runtime_dir_path is None:
+        _runtime_dir_path = tempfile.mkdtemp(prefix="vpn-clicker-")
+        atexit.register(shutil.rmtree, _runtime_dir_path, True)
+    return _runtime_dir_path
+
+def stop_openvpn(proc, pid_path):
+    """
+    Ukončí OpenVPN proces. Signál posíláme přes sudo přímo procesu openvpn (PID z --writepid):
+    sudo nepřeposílá signály od procesů ze stejné skupiny procesů, takže samotné
+    proc.terminate() často nic neudělá a čekalo by se až na timeout.
+    PID ze souboru signalizujeme jen dokud běží sudo: sudo končí až po svém příkazu,
+    takže po jeho skončení už PID může patřit jinému procesu.
+    """
+    try:
+        if proc.poll() is not None:
+            return  # sudo i OpenVPN už skončily
+        try:
+            with open(pid_path) as f:
+                pid = f.read().strip()
+        except OSError:
+            pid = None  # OpenVPN ještě PID nezapsal (skončil hned po startu)
+        if pid:
+            subprocess.run(["sudo", "kill", "-TERM", pid], check=False)
+        else:
+            proc.terminate()
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            if pid:
+                subprocess.run(["sudo", "kill", "-KILL", pid], check=False)
+            proc.kill()
+    except Exception as e:
+        logging.exception("Chyba při ukončování OpenVPN: %s", e)
+    finally:
+        # starší verze OpenVPN soubor s PID po sobě nemažou; adresář je náš, smažeme jej sami
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(pid_path)
+
+@functools.lru_cache(maxsize=None)
+def resolve_openvpn_bin(path):
+    """
+    Ověří OpenVPN binárku: pokud zadaná cesta neexistuje, zkusí ji najít v PATH.
+    Výsledek se pamatuje, takže se PATH neprochází pro každý config znovu.
+    """
+    if os.path.exists(path):
+        return path
+    alt = shutil.which(os.path.basename(path))
+    if alt:
+        logging.info(f"OpenVPN binárka nalezena v PATH: {alt}")
+        return alt
+    raise FileNotFoundError(
+        f"OpenVPN binary not found: {path}.\n"
+        "Nainstalujte OpenVPN například přes Homebrew: `brew install openvpn`"
+    )
+
+def _remove_if_exists(path):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+def prepare_auth_file():
+    """
+    Pokud není nastaven OPENVPN_AUTH_FILE, ale máme OPENVPN_USER/OPENVPN_PASS, zapíše je
+    jednou za běh do dočasného souboru (0600), nastaví na něj OPENVPN_AUTH_FILE
+    a zaregistruje jeho smazání při ukončení skriptu.
+    """
+    global OPENVPN_AUTH_FILE
+    if OPENVPN_AUTH_FILE or not (OPENVPN_USER and OPENVPN_PASS):
+        return
+    tf = tempfile.NamedTemporaryFile(delete=False, mode="w", prefix="ovpn-creds-", dir=None)
+    try:
+        os.chmod(tf.name, stat.S_IRUSR | stat.S_IWUSR)  # 0o600
+        tf.write(f"{OPENVPN_USER}\n{OPENVPN_PASS}\n")
+        tf.close()
+    except Exception:
+        # cleanup if something failed
+        tf.close()
+        os.remove(tf.name)
+        raise
+    atexit.register(_remove_if_exists, tf.name)
+    OPENVPN_AUTH_FILE = tf.name
+    logging.info("Přihlašovací údaje pro OpenVPN budou použity z environment proměnných.")
+
+def kill_stale_openvpn(timeout=5.0):
+    """
+    Ukončí všechny běžící OpenVPN procesy (i ty, které nespustil tento skript)
+    a počká, až opravdu skončí a uklidí po sobě trasy. Volá se jednou při startu.
+    """
+    if subprocess.run(["sudo", "pkill", "-TERM", "-x", "openvpn"], check=False).returncode != 0:
+        return
+    logging.warning("Ukončuji zbylé OpenVPN procesy z předchozího běhu...")
+    deadline = time.monotonic() + timeout
+    while subprocess.run(["pgrep", "-x", "openvpn"], stdout=subprocess.DEVNULL, check=False).returncode == 0:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Zbylé OpenVPN procesy se neukončily do {timeout} sekund.")
+        time.sleep(0.05)
+
 @contextmanager
 def start_openvpn(config_path):
     """
-    Spustí openvpn s daným configem, sleduje stdout pro potvrzení spojení.
-    Vrací proces. Pokud se nepřipojí do CONNECT_TIMEOUT, vyhodí výjimku.
+    Spustí openvpn s daným configem, sleduje stdout pro potvrzení spojení
+    a ověří, že výchozí trasa vede tunelem. Vrací proces.
+    Pokud se nepřipojí do CONNECT_TIMEOUT, vyhodí výjimku.
     Vyžaduje sudo práva pro spuštění OpenVPN.
     """
     logging.info("OpenVPN vyžaduje sudo práva pro přístup k síťovým rozhraním.")
@@ -70,155 +225,306 @@ def start_openvpn(config_path):
             "Nastavte buď OPENVPN_AUTH_FILE nebo OPENVPN_USER a OPENVPN_PASS v .env souboru."
         )
 
-    # zkusíme ověřit binárku: pokud není absolutní cesta dostupná, zkusíme ji najít v PATH
-    if not os.path.exists(OPENVPN_BIN):
-        alt = shutil.which(os.path.basename(OPENVPN_BIN))
-        if alt:
-            logging.info(f"OpenVPN binárka nalezena v PATH: {alt}")
-            openvpn_exec = alt
-        else:
-            raise FileNotFoundError(
-                f"OpenVPN binary not found: {OPENVPN_BIN}.\n"
-                "Nainstalujte OpenVPN například přes Homebrew: `brew install openvpn`"
-            )
-    else:
-        openvpn_exec = OPENVPN_BIN
+    openvpn_exec = resolve_openvpn_bin(OPENVPN_BIN)
 
-    # připravíme příkaz; pokud máme soubor s přihlašovacími údaji (OPENVPN_AUTH_FILE), použijeme jej,
-    # jinak pokud jsou v env OPENVPN_USER/OPENVPN_PASS, vytvoříme temp soubor
-    cmd = [openvpn_exec, "--config", config_path]
-    cred_temp_path = None
+    # připravíme příkaz; soubor s přihlašovacími údaji (OPENVPN_AUTH_FILE) je buď zadaný,
+    # nebo jej z OPENVPN_USER/OPENVPN_PASS jednou za běh vytvoří prepare_auth_file()
+    cmd = [openvpn_exec, "--config", config_path, "--data-ciphers", OPENVPN_DATA_CIPHERS]
+    # velikost socket bufferů necháme na jádře (auto-tuning) místo pevných 64 KiB
+    cmd += ["--sndbuf", "0", "--rcvbuf", "0"]
+    # PID skutečného procesu openvpn (ne sudo), abychom mu při ukončení mohli poslat signál
+    pid_path = os.path.join(_runtime_dir(), os.path.basename(config_path) + ".pid")
+    cmd += ["--writepid", pid_path]
     if OPENVPN_AUTH_FILE:
         if not os.path.exists(OPENVPN_AUTH_FILE):
             raise FileNotFoundError(f"OPENVPN_AUTH_FILE set but file does not exist: {OPENVPN_AUTH_FILE}")
         cmd += ["--auth-user-pass", OPENVPN_AUTH_FILE]
-        logging.info(f"Používám existující auth file z OPENVPN_AUTH_FILE: {OPENVPN_AUTH_FILE}")
-    elif OPENVPN_USER and OPENVPN_PASS:
-        tf = tempfile.NamedTemporaryFile(delete=False, mode="w", prefix="ovpn-creds-", dir=None)
-        try:
-            tf.write(f"{OPENVPN_USER}\n{OPENVPN_PASS}\n")
-            tf.close()
-            os.chmod(tf.name, stat.S_IRUSR | stat.S_IWUSR)  # 0o600
-            cred_temp_path = tf.name
-            cmd += ["--auth-user-pass", cred_temp_path]
-            logging.info("Přihlašovací údaje pro OpenVPN budou použity z environment proměnných.")
-        except Exception:
-            # cleanup if something failed
-            try:
-                tf.close()
-            except Exception:
-                pass
-            if os.path.exists(tf.name):
-                os.remove(tf.name)
-            raise
+        logging.info(f"Používám auth file z OPENVPN_AUTH_FILE: {OPENVPN_AUTH_FILE}")
+
+    # zdrojová IP před připojením; používá se, jen pokud OpenVPN nevypíše adresu tunelu
+    ip_before = _source_ip()
 
     # Přidáme sudo před příkaz
     sudo_cmd = ["sudo"] + cmd
     logging.info(f"Spouštím OpenVPN: {sudo_cmd}")
-    proc = subprocess.Popen(sudo_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    # výstup OpenVPN posíláme do pseudoterminálu: na TTY má libc stdout řádkově bufferovaný,
+    # takže potvrzovací řádek dorazí hned a nečeká v blokovém bufferu na flush
+    fd, slave_fd = pty.openpty()
+    try:
+        proc = subprocess.Popen(sudo_cmd, stdout=slave_fd, stderr=slave_fd, bufsize=0)
+    except Exception:
+        os.close(fd)
+        raise
+    finally:
+        os.close(slave_fd)
+
+    # výstup čteme neblokujícím způsobem a na data čekáme přes selector (bez aktivního čekání)
+    os.set_blocking(fd, False)
+    selector = selectors.DefaultSelector()
+    selector.register(fd, selectors.EVENT_READ)
 
     connected = False
-    start = time.time()
+    tun_ip = None
+    pending = b""
+    log_debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    start = time.monotonic()
     try:
-        # čteme řádky z stdout, hledáme známý text (OpenVPN hlásí "Initialization Sequence Completed")
-        while True:
-            if proc.poll() is not None:
-                # proces skončil předčasně (před připojením)
-                if proc.returncode != 0:
+        # čteme výstup po blocích, hledáme známý text (OpenVPN hlásí "Initialization Sequence Completed")
+        while not connected:
+            remaining = CONNECT_TIMEOUT - (time.monotonic() - start)
+            if remaining <= 0 or not selector.select(remaining):
+                raise TimeoutError("Timeout při připojování VPN.")
+            try:
+                chunk = os.read(fd, 4096)
+            except BlockingIOError:
+                continue
+            except OSError:
+                # po ukončení procesu vrací master strana PTY na Linuxu EIO místo EOF
+                chunk = b""
+            if not chunk:
+                # EOF: proces skončil předčasně (před připojením)
+                if proc.wait() != 0:
                     raise RuntimeError(f"OpenVPN proces selhal s chybovým kódem {proc.returncode}")
                 else:
                     raise RuntimeError("OpenVPN proces se ukončil předčasně (před potvrzením připojení)")
-            line = proc.stdout.readline()
-            if line:
-                logging.debug(f"[openvpn] {line.strip()}")
-                # Pokud OpenVPN požádá o interaktivní přihlášení a my nemáme credentials, přestaňme
-                if ("Enter Auth Username" in line or "AUTH" in line and "Username" in line) and not (OPENVPN_AUTH_FILE or cred_temp_path):
-                    raise RuntimeError(
-                        "OpenVPN vyžaduje interaktivní zadání uživatelského jména/hesla."
-                        " Nastavte OPENVPN_USER/OPENVPN_PASS nebo OPENVPN_AUTH_FILE a spusťte znovu."
-                    )
-                if "Initialization Sequence Completed" in line or "CONNECTED,SUCCESS" in line:
-                    connected = True
-                    logging.info("VPN připojena.")
-                    break
-            if time.time() - start > CONNECT_TIMEOUT:
-                raise TimeoutError("Timeout při připojování VPN.")
-            time.sleep(0.1)
+            pending += chunk
+            # výstup prohledáváme přímo v bajtech; dekódujeme ho jen pro debug log
+            line_end = pending.rfind(b"\n") + 1
+            if log_debug:
+                for line in pending[:line_end].splitlines():
+                    logging.debug(f"[openvpn] {line.decode(errors='replace').strip()}")
+            # adresa tunelu z PUSH_REPLY ("...,ifconfig 10.8.8.2 255.255.255.0,...")
+            if tun_ip is None:
+                match = PUSH_IFCONFIG_RE.search(pending, 0, line_end)
+                if match:
+                    tun_ip = match.group(1).decode()
+            if b"Initialization Sequence Completed" in pending or b"CONNECTED,SUCCESS" in pending:
+                connected = True
+                logging.info("VPN připojena.")
+            # ponecháme jen nedokončený poslední řádek
+            pending = pending[line_end:]
+
+        # potvrzovací řádek ještě neznamená, že jádro už směruje provoz tunelem:
+        # čekáme, až odchozí provoz dostane adresu tunelu (bez ní aspoň jinou než před připojením)
+        if tun_ip is None:
+            logging.debug("OpenVPN nevypsal adresu tunelu, ověřuji jen změnu zdrojové IP.")
+        while (_source_ip() != tun_ip) if tun_ip else (_source_ip() in (None, ip_before)):
+            if time.monotonic() - start > CONNECT_TIMEOUT:
+                raise TimeoutError("Timeout při čekání na výchozí trasu přes VPN.")
+            time.sleep(0.05)
+        logging.debug(f"Provoz odchází přes VPN (zdrojová IP {_source_ip()}).")
         yield proc
     finally:
+        selector.close()
+        os.close(fd)
         logging.info("Ukoncovani OpenVPN procesu...")
+        stop_openvpn(proc, pid_path)
+
+def wait_for_connectivity(host, port, timeout=2.0):
+    """
+    Zkouší navázat TCP spojení na host:port, nejdéle `timeout` sekund.
+    Host se přeloží jen jednou a každý pokus smí čerpat celý zbývající čas
+    (handshake přes vzdálený tunel trvá i stovky ms). Exponenciální pauza (10 ms, 20 ms, ...)
+    následuje jen po rychlém odmítnutí, např. když trasa přes tunel ještě neexistuje.
+    Vrací True, jakmile se spojení podaří, jinak False.
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][4][:2]
+    except OSError as e:
+        logging.debug(f"Nepodařilo se přeložit {host}: {e}")
+        return False
+    delay = 0.01
+    while (remaining := deadline - time.monotonic()) > 0:
         try:
-            proc.terminate()
-            try:
-                proc.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                proc.kill()
-        except Exception as e:
-            logging.exception("Chyba při ukončování OpenVPN: %s", e)
-        # odebereme dočasný soubor s přihlašovacími údaji, pokud jsme jej vytvořili
-        try:
-            if cred_temp_path and os.path.exists(cred_temp_path):
-                os.remove(cred_temp_path)
-                logging.debug("Dočasný soubor s přihlašovacími údaji odstraněn.")
-        except Exception:
-            logging.exception("Nepodařilo se odstranit dočasný soubor s přihlašovacími údaji")
+            with socket.create_connection(address, timeout=remaining):
+                logging.debug(f"Server {host}:{port} je dosažitelný.")
+                return True
+        except TimeoutError:
+            return False
+        except OSError as e:
+            # ECONNREFUSED, ENETUNREACH apod.: zkusíme znovu po krátké pauze
+            logging.debug(f"Server {host}:{port} zatím nedostupný: {e}")
+        time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+        delay *= 2
+    return False
+
+async def _block_heavy_resources(route):
+    # obrázky, média, fonty a styly anketa nepotřebuje; stahovat je jen zdržuje načtení přes VPN
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def _gather_or_cancel(*aws):
+    """
+    Jako asyncio.gather, ale při chybě jedné větve zruší ostatní a počká na ně,
+    aby po zavření stránky nezůstala viset úloha s nevyzvednutou výjimkou.
+    Výjimku propouští tak, jak je (na rozdíl od TaskGroup, která ji zabalí do ExceptionGroup).
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
-def perform_web_action(url, button_selector, headless=True):
+async def perform_web_action(browser, url, button_selector):
     """
-    Otevře stránku a klikne na tlačítko pomocí Playwright (synchronní).
+    Otevře stránku v novém kontextu sdíleného prohlížeče a klikne na tlačítko
+    pomocí Playwright (asynchronní). Kontext izoluje cookies a storage mezi hlasy.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        context = browser.new_context()
-        page = context.new_page()
+    context = await browser.new_context()
+    try:
+        await context.route("**/*", _block_heavy_resources)
+        page = await context.new_page()
         logging.info(f"Načítám stránku: {url}")
-        page.goto(url, timeout=ACTION_TIMEOUT * 1000)
-        try:
-            # Nejdřív zkusíme odkliknout cookies
+        # anketa potřebuje jen DOM, na dočtení všech zdrojů (událost load) nečekáme
+        await page.goto(url, wait_until="domcontentloaded", timeout=ACTION_TIMEOUT * 1000)
+
+        async def dismiss_cookies():
+            # cookies dialog odklikneme hned, jak se objeví; jeho absence není chyba
+            cookie_button = "button#didomi-notice-agree-button"
             try:
-                logging.info("Čekám na cookies dialog...")
-                cookie_button = "button#didomi-notice-agree-button"
-                page.wait_for_selector(cookie_button, timeout=ACTION_TIMEOUT * 1000)
-                page.click(cookie_button)
+                await page.wait_for_selector(cookie_button, timeout=ACTION_TIMEOUT * 1000)
+                await page.click(cookie_button)
                 logging.info(f"Cookies dialog odkliknut, čekám {COOKIES_DELAY} sekund na načtení ankety...")
-                time.sleep(COOKIES_DELAY)
+                await asyncio.sleep(COOKIES_DELAY)
             except PWTimeout:
                 logging.info("Cookies dialog se nezobrazil nebo již byl potvrzen.")
 
-            # Najdeme správnou sekci podle textu
-            logging.info(f"Hledám sekci s textem '{TARGET_TEXT}'...")
-            section_selector = f".survey__progress-text >> text={TARGET_TEXT}"
-            page.wait_for_selector(section_selector, timeout=ACTION_TIMEOUT * 1000)
-            section = page.locator(section_selector)
-            
-            # Najdeme tlačítko v rámci správné sekce
-            button = section.locator("xpath=../../../..").locator(button_selector)
-            votes_element = section.locator("xpath=../../../..").locator(VOTES_SELECTOR)
-            
-            logging.info("Čekám na tlačítko a počet hlasů...")
-            page.wait_for_selector(button_selector, timeout=ACTION_TIMEOUT * 1000)
-            page.wait_for_selector(VOTES_SELECTOR, timeout=ACTION_TIMEOUT * 1000)
-            
-            # Získáme počet hlasů před kliknutím
-            votes_before = votes_element.text_content()
-            logging.info(f"Počet hlasů před kliknutím: {votes_before}")
-            
-            # Klikneme na tlačítko
-            button.click(timeout=ACTION_TIMEOUT * 1000)
-            logging.info("Kliknutí proběhlo, čekám na aktualizaci hlasů...")
-            
-            # Počkáme na aktualizaci hlasů a získáme nový počet
-            time.sleep(WAIT_AFTER_CLICK)
-            votes_after = votes_element.text_content()
-            logging.info(f"Počet hlasů po kliknutí: {votes_after}")
-            time.sleep(WAIT_AFTER_CLICK)
-            logging.info("Kliknutí proběhlo.")
-        except PWTimeout:
-            logging.warning("Nepodařilo se najít nebo kliknout na tlačítko (timeout).")
+        # Na cookies dialog a sekci čekáme souběžně; na tlačítko a počet hlasů čekají
+        # až lokátory níže (text_content i click čekají na element samy)
+        logging.info(f"Čekám na cookies dialog a sekci s textem '{TARGET_TEXT}'...")
+        await _gather_or_cancel(
+            dismiss_cookies(),
+            page.wait_for_selector(SECTION_SELECTOR, timeout=ACTION_TIMEOUT * 1000),
+        )
+
+        # Najdeme tlačítko a počet hlasů v rámci kontejneru správné sekce
+        container = page.locator(SECTION_SELECTOR).locator(SECTION_CONTAINER_XPATH)
+        button = container.locator(button_selector)
+        votes_element = container.locator(VOTES_SELECTOR)
+
+        # Počet hlasů před kliknutím čteme souběžně s čekáním na viditelné tlačítko
+        votes_before, _ = await _gather_or_cancel(
+            votes_element.text_content(timeout=ACTION_TIMEOUT * 1000),
+            button.wait_for(state="visible", timeout=ACTION_TIMEOUT * 1000),
+        )
+        logging.info(f"Počet hlasů před kliknutím: {votes_before}")
+
+        # Klikneme na tlačítko
+        await button.click(timeout=ACTION_TIMEOUT * 1000)
+        logging.info("Kliknutí proběhlo, čekám na aktualizaci hlasů...")
+
+        # Místo pevné pauzy čekáme, až se text s počtem hlasů změní (nejdéle WAIT_AFTER_CLICK);
+        # změna textu znamená, že server hlas přijal, takže další pauza už není potřeba
+        # expect lokátor při každé kontrole dohledává znovu, takže funguje i když anketa
+        # element s počtem hlasů po kliknutí nahradí novým
+        try:
+            await expect(votes_element).not_to_have_text(
+                (votes_before or "").strip(), timeout=WAIT_AFTER_CLICK * 1000
+            )
+        except AssertionError:
+            logging.warning(f"Počet hlasů se do {WAIT_AFTER_CLICK} sekund nezměnil.")
+        votes_after = await votes_element.text_content(timeout=ACTION_TIMEOUT * 1000)
+        logging.info(f"Počet hlasů po kliknutí: {votes_after}")
+        logging.info("Kliknutí proběhlo.")
+    except PWTimeout:
+        logging.warning("Nepodařilo se najít nebo kliknout na tlačítko (timeout).")
+        raise
+    finally:
+        await context.close()
+
+@asynccontextmanager
+async def _in_thread(cm):
+    """
+    Provede vstup i výstup synchronního context manageru ve vlákně,
+    aby blokující kód (čekání na OpenVPN, sudo, sockety) nezastavil event loop.
+    """
+    result = await asyncio.to_thread(cm.__enter__)
+    try:
+        yield result
+    except BaseException as e:
+        if not await asyncio.to_thread(cm.__exit__, type(e), e, e.__traceback__):
             raise
+    else:
+        await asyncio.to_thread(cm.__exit__, None, None, None)
+
+async def run_configs(ovpn_files, headless=True):
+    """
+    Postupně zpracuje zadané VPN konfigurace: připojí VPN a provede akci na webu.
+    Prohlížeč se spouští jen jednou pro celý běh, pro každý hlas se vytváří nový kontext.
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            for cfg in ovpn_files:
+                logging.info("=== Zpracovávám: %s ===", cfg)
+                # sdílený prohlížeč žije přes všechny konfigurace; pokud spadl, spustíme nový
+                if not browser.is_connected():
+                    logging.warning("Prohlížeč není připojen, spouštím jej znovu.")
+                    browser = await p.chromium.launch(headless=headless)
+                try:
+                    async with _in_thread(start_openvpn(cfg)):
+                        # místo pevné pauzy ověříme, že je cílový server přes tunel dosažitelný
+                        reachable = await asyncio.to_thread(
+                            wait_for_connectivity, urlparse(PAGE_URL).hostname, 443, timeout=2.0
+                        )
+                        if not reachable:
+                            logging.warning("Server není po připojení VPN dosažitelný, pokračuji i tak.")
+                        # jedno připojení VPN lze využít pro více hlasů (každý hlas má vlastní kontext)
+                        for vote in range(1, VOTES_PER_VPN + 1):
+                            if VOTES_PER_VPN > 1:
+                                logging.info("Hlas %d/%d přes %s", vote, VOTES_PER_VPN, cfg)
+                            try:
+                                await perform_web_action(browser, PAGE_URL, BUTTON_SELECTOR)
+                            except Exception as e:
+                                logging.exception("Chyba při vykonávání akce na webu: %s", e)
+                except TimeoutError as te:
+                    logging.warning("Nepřipojeno k VPN (timeout) pro %s: %s", cfg, te)
+                except Exception as e:
+                    logging.exception("Chyba při práci s VPN configem %s: %s", cfg, e)
         finally:
-            context.close()
-            browser.close()
+            await browser.close()
+
+async def process_one_config(cfg, free_netns, child_args):
+    """
+    Zpracuje jeden config v prvním volném síťovém namespace.
+    Skript se spustí znovu přes `ip netns exec` s parametrem --config, takže OpenVPN
+    i prohlížeč běží uvnitř namespace a používají jeho tunel.
+    """
+    netns = await free_netns.get()
+    try:
+        cmd = [
+            "sudo", "ip", "netns", "exec", netns,
+            # zpět na původního uživatele, aby Playwright našel své prohlížeče v domovském adresáři
+            "sudo", "-H", "-u", getpass.getuser(),
+            # nastavení z prostředí rodiče předáme explicitně, sudo je jinak zahodí
+            "env", *(f"{name}={os.environ[name]}" for name in WORKER_ENV_VARS if name in os.environ),
+            sys.executable, os.path.abspath(__file__), "--config", cfg,
+        ] + child_args
+        logging.info("[%s] Spouštím worker pro %s", netns, cfg)
+        proc = await asyncio.create_subprocess_exec(*cmd)
+        returncode = await proc.wait()
+        if returncode != 0:
+            logging.warning("Worker pro %s skončil s chybovým kódem %d", cfg, returncode)
+    finally:
+        free_netns.put_nowait(netns)
+
+async def run_parallel(ovpn_files, workers, child_args):
+    """
+    Zpracuje konfigurace souběžně, nejvýše `workers` najednou, každou ve vlastním namespace.
+    Fronta volných namespace zároveň omezuje počet souběžných workerů.
+    """
+    free_netns = asyncio.Queue()
+    for i in range(workers):
+        free_netns.put_nowait(f"{NETNS_PREFIX}{i}")
+    logging.info("Spouštím %d paralelních workerů (namespacy %s0..%s%d).",
+                 workers, NETNS_PREFIX, NETNS_PREFIX, workers - 1)
+    await asyncio.gather(*(process_one_config(cfg, free_netns, child_args) for cfg in ovpn_files))
 
 def main():
     # CLI argument parsing (přepisitelné nastavení přes environment proměnné)
@@ -227,6 +533,11 @@ def main():
     parser.add_argument("--auth-file", dest="auth_file", help="cesta k souboru s přihlašovacími údaji (username\\npassword)")
     parser.add_argument("--headed", dest="headed", action="store_true", help="spustit prohlížeč v headful módu (ne headless)")
     parser.add_argument("--limit", dest="limit", type=int, help="zpracovat pouze prvních N VPN konfigurací")
+    parser.add_argument("--workers", dest="workers", type=int, default=1,
+                        help="počet paralelních workerů; každý běží v namespace <NETNS_PREFIX><i> (jen Linux)")
+    parser.add_argument("--config", dest="config", help="zpracovat pouze zadaný .ovpn soubor (používají paralelní workery)")
+    parser.add_argument("--kill-stale", dest="kill_stale", action="store_true",
+                        help="před startem ukončit všechny běžící OpenVPN procesy (i nesouvisející)")
     args = parser.parse_args()
 
     # přepiš globální proměnné pokud byly předány přes CLI
@@ -236,8 +547,13 @@ def main():
     if args.auth_file:
         OPENVPN_AUTH_FILE = args.auth_file
     headless = not args.headed
+    # soubor s přihlašovacími údaji vytvoříme jednou pro celý běh, ne pro každý config
+    prepare_auth_file()
 
-    ovpn_files = find_ovpn_files(VPN_CONFIG_DIR)
+    if args.config:
+        ovpn_files = [args.config]
+    else:
+        ovpn_files = find_ovpn_files(VPN_CONFIG_DIR)
     if args.limit and args.limit > 0:
         ovpn_files = ovpn_files[:args.limit]
     if not ovpn_files:
@@ -246,20 +562,29 @@ def main():
 
     logging.info("Nalezeno %d VPN konfigurací.", len(ovpn_files))
 
-    for cfg in ovpn_files:
-        logging.info("=== Zpracovávám: %s ===", cfg)
-        try:
-            with start_openvpn(cfg):
-                # drobná pauza pro jistotu routingu
-                time.sleep(2)
-                try:
-                    perform_web_action(PAGE_URL, BUTTON_SELECTOR, headless=headless)
-                except Exception as e:
-                    logging.exception("Chyba při vykonávání akce na webu: %s", e)
-        except TimeoutError as te:
-            logging.warning("Nepřipojeno k VPN (timeout) pro %s: %s", cfg, te)
-        except Exception as e:
-            logging.exception("Chyba při práci s VPN configem %s: %s", cfg, e)
+    # binárku ověříme jednou hned na začátku (až po případném přepsání cesty z CLI)
+    try:
+        openvpn_exec = resolve_openvpn_bin(OPENVPN_BIN)
+    except FileNotFoundError as e:
+        logging.error("%s", e)
+        return
+
+    # parametry, které se předávají workerům spuštěným v namespace; binárku předáváme vždy
+    # už dohledanou, worker pod sudo má jiné PATH (secure_path) a nevidí exportované OPENVPN_BIN
+    child_args = ["--openvpn-bin", openvpn_exec]
+    if OPENVPN_AUTH_FILE:
+        child_args += ["--auth-file", os.path.abspath(OPENVPN_AUTH_FILE)]
+    if args.headed:
+        child_args.append("--headed")
+
+    # zbylý proces z předchozího (spadlého) běhu by si s novým přetahoval výchozí trasu
+    if args.kill_stale:
+        kill_stale_openvpn()
+
+    if args.workers > 1:
+        asyncio.run(run_parallel(ovpn_files, args.workers, child_args))
+    else:
+        asyncio.run(run_configs(ovpn_files, headless))
 
     logging.info("Hotovo — zpracovány všechny VPN konfigurace.")
 